@@ -0,0 +1,97 @@
+'''
+Measure how long it takes to repair a schedule after a machine outage, against
+the length of the horizon, and compare it with re-solving from scratch.
+
+For each horizon we solve a synthetic problem, then knock out machine 3 for
+OUTAGE_HOURS in the middle of the horizon and repair. The re-solve is given
+the same outage on the machine's calendar and the same iteration budget as the
+original solve.
+
+    python benchmark_repair.py
+'''
+
+from benchmark_schedules import make_problem
+
+from lab_demo import BudgetSchedule, ShiftCalendar, Solver
+
+import statistics
+import tempfile
+import time
+
+
+WEEKS = [4, 8, 16, 32]
+ITERATIONS = 20000
+REPAIR_ITERATIONS = 1000
+OUTAGE_MACHINE = 3
+OUTAGE_HOURS = 6
+REPEATS = 5
+
+
+def make_solver(problem, seed):
+
+    return Solver(
+        problem=problem,
+        iterations=ITERATIONS,
+        temperature=10,
+        cooling_rate=0.9,
+        turn_off_pct=15,
+        seed=seed,
+        write_csvs=False,
+        schedule=BudgetSchedule()
+    )
+
+
+def main():
+
+    print(
+        f"{'weeks':>6}{'hours':>8}{'repair (ms)':>14}{'re-solve (ms)':>16}"
+        f"{'repaired cost':>16}{'re-solved cost':>16}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for weeks in WEEKS:
+
+            problem = make_problem(0, directory, weeks)
+            horizon = len(problem.forecast) - 1
+            outage_start = horizon // 2 + 8
+
+            machine = next(
+                machine for machine in problem.machines
+                if machine.id == OUTAGE_MACHINE
+            )
+
+            repair_times = []
+            for seed in range(REPEATS):
+                solver = make_solver(problem, seed)
+                solver.solve()
+
+                start = time.perf_counter()
+                solver.repair_outage(
+                    OUTAGE_MACHINE,
+                    outage_start,
+                    outage_start + OUTAGE_HOURS,
+                    iterations=REPAIR_ITERATIONS
+                )
+                repair_times.append(time.perf_counter() - start)
+
+            # Re-solve from scratch with the outage on the machine's calendar
+            machine.calendar = ShiftCalendar.from_shift_pattern(
+                machine.shift_pattern, horizon
+            ).with_outage(outage_start, outage_start + OUTAGE_HOURS)
+            resolver = make_solver(problem, 0)
+
+            start = time.perf_counter()
+            resolver.solve()
+            resolve_time = time.perf_counter() - start
+
+            print(
+                f"{weeks:>6}{horizon:>8}"
+                f"{statistics.median(repair_times) * 1000:>14.1f}"
+                f"{resolve_time * 1000:>16.1f}"
+                f"{solver.get_best_cost():>16.0f}"
+                f"{resolver.get_best_cost():>16.0f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+'''
+Compare the cooling schedules on some synthetic problems.
+
+For every problem we find the best cost that any schedule managed, then report
+how long each schedule took to get within QUALITY_PCT of it (time-to-quality)
+along with the final cost. Times are wall clock for the annealing loop only,
+pro-rated by the iteration at which the target was first hit.
+
+    python benchmark_schedules.py
+'''
+
+from lab_demo import (
+    AdaptiveSchedule,
+    BudgetSchedule,
+    GeometricSchedule,
+    Machine,
+    Problem,
+    SalesForecast,
+    Solver
+)
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+
+ITERATIONS = 20000
+TEMPERATURE = 10
+PROBLEMS = 3
+SEEDS = 3
+QUALITY_PCT = 1
+
+SCHEDULES = {
+    'geometric (0.9)': lambda: GeometricSchedule(0.9),
+    'budget': lambda: BudgetSchedule(),
+    'adaptive': lambda: AdaptiveSchedule()
+}
+
+SHIFTS = ['6-2', '2-10', '6-2 and 2-10', '2-10']
+
+
+def make_problem(problem_seed, directory, weeks=4):
+    """ A random forecast that roughly matches the capacity of the machines """
+
+    rng = random.Random(problem_seed)
+    products = [f"Product_{x}" for x in range(1, 9)]
+
+    # The solver multiplies demand by 100, and the four machines can make
+    # about 15,000 units a week between them, so this keeps us near capacity
+    file_path = os.path.join(
+        directory, f"forecast_{problem_seed}_{weeks}.csv"
+    )
+    with open(file_path, 'w') as f:
+        f.write(",".join(products) + "\n")
+        for _ in range(weeks):
+            f.write(
+                ",".join(str(rng.randint(0, 38)) for _ in products) + "\n"
+            )
+
+    sales_forecast = SalesForecast(file_path)
+    sales_forecast.interpolate_forecast()
+
+    problem = Problem()
+    problem.add_forecast(sales_forecast)
+
+    Machine.seen_machine_ids.clear()
+    forecast_products = sales_forecast.get_products()
+    for machine_id, shift in enumerate(SHIFTS, start=1):
+        machine = Machine(machine_id=machine_id, shift_pattern=shift)
+        for product in rng.sample(forecast_products, 4):
+            machine.add_product(product)
+        problem.add_machine(machine)
+
+    problem.build()
+
+    return problem
+
+
+def run(problem, schedule, seed):
+
+    solver = Solver(
+        problem=problem,
+        iterations=ITERATIONS,
+        temperature=TEMPERATURE,
+        cooling_rate=0.9,
+        turn_off_pct=15,
+        seed=seed,
+        write_csvs=False,
+        schedule=schedule
+    )
+
+    start = time.perf_counter()
+    solver.solve()
+    elapsed = time.perf_counter() - start
+
+    # Best cost seen up to each iteration
+    best_by_iteration = np.full(ITERATIONS, np.inf)
+    for iteration, cost in solver._solution_costs:
+        best_by_iteration[iteration] = min(
+            best_by_iteration[iteration], cost
+        )
+    best_by_iteration = np.minimum.accumulate(best_by_iteration)
+
+    return solver.get_best_cost(), best_by_iteration, elapsed
+
+
+def main():
+
+    results = {name: {'ttq': [], 'gap': []} for name in SCHEDULES}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for problem_seed in range(PROBLEMS):
+            problem = make_problem(problem_seed, directory)
+
+            runs = {}
+            for name, schedule in SCHEDULES.items():
+                runs[name] = [
+                    run(problem, schedule(), seed) for seed in range(SEEDS)
+                ]
+
+            best = min(
+                cost for problem_runs in runs.values()
+                for cost, _, _ in problem_runs
+            )
+            target = best * (1 + QUALITY_PCT / 100)
+
+            for name, problem_runs in runs.items():
+                for cost, best_by_iteration, elapsed in problem_runs:
+                    results[name]['gap'].append((cost / best - 1) * 100)
+                    hit = np.nonzero(best_by_iteration <= target)[0]
+                    if len(hit):
+                        results[name]['ttq'].append(
+                            elapsed * (hit[0] + 1) / ITERATIONS
+                        )
+
+    runs_per_schedule = PROBLEMS * SEEDS
+    print(
+        f"{'schedule':<18}{'hit target':>12}{'median ttq (s)':>16}"
+        f"{'mean gap to best (%)':>22}"
+    )
+    for name, result in results.items():
+        ttq = result['ttq']
+        median_ttq = f"{statistics.median(ttq):.3f}" if ttq else "-"
+        print(
+            f"{name:<18}{len(ttq):>6}/{runs_per_schedule:<5}"
+            f"{median_ttq:>16}{statistics.mean(result['gap']):>22.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,11 @@ from lab_demo.machine import Machine
 from lab_demo.forecast import SalesForecast
 from lab_demo.problem import Problem
 from lab_demo.products import Product
+from lab_demo.schedules import (
+    AdaptiveSchedule,
+    BudgetSchedule,
+    CoolingSchedule,
+    GeometricSchedule
+)
+from lab_demo.shift_calendar import ShiftCalendar
 from lab_demo.solver import Solver
\ No newline at end of file
@@ -0,0 +1,4 @@
+from lab_demo.cli import main
+
+
+main()
@@ -0,0 +1,195 @@
+'''
+Command line entry point so that one or many problems can be solved in a single
+warm process, e.g.
+
+    python -m lab_demo \
+        --spec forecast_a.csv machines_a.json \
+        --spec forecast_b.csv machines_b.json \
+        --iterations 5000 --output-dir results
+
+Each spec is a sales forecast CSV plus a JSON machine definition file of the
+form:
+
+    [
+        {"machine_id": 1, "shift_pattern": "6-2", "products": ["Product_1"]},
+        ...
+    ]
+'''
+
+from lab_demo.machine import Machine
+from lab_demo.forecast import SalesForecast
+from lab_demo.problem import Problem
+from lab_demo.schedules import (
+    AdaptiveSchedule,
+    BudgetSchedule,
+    GeometricSchedule
+)
+from lab_demo.solver import Solver
+
+import argparse
+import json
+import os
+import time
+
+
+def load_problem(forecast_path, machines_path):
+    """ Build a Problem from a forecast CSV and a machine definition file """
+
+    # SalesForecast resolves relative paths against the package, but on the
+    # command line we want them relative to where the user is standing
+    sales_forecast = SalesForecast(os.path.abspath(forecast_path))
+    sales_forecast.interpolate_forecast()
+
+    problem = Problem()
+    problem.add_forecast(sales_forecast)
+
+    products = {
+        product.name: product for product in sales_forecast.get_products()
+    }
+
+    with open(machines_path) as f:
+        machine_specs = json.load(f)
+
+    # Duplicate machine IDs are tracked across the whole process, but in a
+    # batch every problem is allowed to have its own machine 1, 2 etc.
+    Machine.seen_machine_ids.clear()
+
+    for spec in machine_specs:
+        machine = Machine(
+            machine_id=spec['machine_id'],
+            shift_pattern=spec['shift_pattern']
+        )
+        for product_name in spec['products']:
+            if product_name not in products:
+                raise ValueError(
+                    f"Product: {product_name} is not in the forecast!"
+                )
+            machine.add_product(products[product_name])
+        problem.add_machine(machine)
+
+    problem.build()
+
+    return problem
+
+
+SCHEDULES = {
+    'geometric': lambda args: GeometricSchedule(args.cooling_rate),
+    'budget': lambda args: BudgetSchedule(),
+    'adaptive': lambda args: AdaptiveSchedule()
+}
+
+
+def write_solution(solver, file_path):
+
+    import pandas as pd
+
+    df = pd.DataFrame(solver.get_solution())
+    df.to_csv(file_path, index=False)
+
+
+def _parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(
+        prog='python -m lab_demo',
+        description='Solve one or many machine scheduling problems'
+    )
+    parser.add_argument(
+        '--spec',
+        nargs=2,
+        action='append',
+        required=True,
+        metavar=('FORECAST', 'MACHINES'),
+        help='Forecast CSV and machine definition JSON. Can be repeated'
+    )
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--temperature', type=float, default=10)
+    parser.add_argument('--cooling-rate', type=float, default=0.9)
+    parser.add_argument(
+        '--schedule',
+        choices=sorted(SCHEDULES),
+        default='geometric',
+        help='Cooling schedule. Only geometric uses --cooling-rate'
+    )
+    parser.add_argument('--turn-off-pct', type=float, default=15)
+    parser.add_argument('--min-swap-hours', type=int, default=8)
+    parser.add_argument(
+        '--slots-per-hour',
+        type=int,
+        default=1,
+        help='Resolution of the shift calendars e.g. 4 for 15 minutes'
+    )
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument(
+        '--gap-tolerance',
+        type=float,
+        default=None,
+        help='Stop once within this fraction of the lower bound e.g. 0.01'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default='.',
+        help='Where to write the <n>_<machines file>_solution.csv results'
+    )
+    parser.add_argument(
+        '--write-debug-csvs',
+        action='store_true',
+        help="Also write the solver's intermediate CSVs to the working dir"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+
+    args = _parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    batch_start = time.perf_counter()
+
+    for spec_number, (forecast_path, machines_path) in enumerate(
+        args.spec, start=1
+    ):
+
+        load_start = time.perf_counter()
+        problem = load_problem(forecast_path, machines_path)
+        load_time = time.perf_counter() - load_start
+
+        solve_start = time.perf_counter()
+        solver = Solver(
+            problem=problem,
+            iterations=args.iterations,
+            temperature=args.temperature,
+            cooling_rate=args.cooling_rate,
+            turn_off_pct=args.turn_off_pct,
+            min_swap_hours=args.min_swap_hours,
+            slots_per_hour=args.slots_per_hour,
+            seed=args.seed,
+            schedule=SCHEDULES[args.schedule](args),
+            gap_tolerance=args.gap_tolerance,
+            write_csvs=args.write_debug_csvs
+        )
+        solver.solve()
+        solve_time = time.perf_counter() - solve_start
+
+        # Number the outputs so that specs sharing a machines file don't
+        # overwrite each other
+        spec_name = (
+            f"{spec_number}_"
+            f"{os.path.splitext(os.path.basename(machines_path))[0]}"
+        )
+        output_path = os.path.join(
+            args.output_dir, f"{spec_name}_solution.csv"
+        )
+        write_solution(solver, output_path)
+
+        print(
+            f"{spec_name}: cost {solver.get_best_cost():.1f}, "
+            f"gap {solver.get_gap():.2%} after {solver.iterations_run} "
+            f"iterations (load {load_time:.3f}s, solve {solve_time:.3f}s) "
+            f"-> {output_path}"
+        )
+
+    print(
+        f"Solved {len(args.spec)} problem(s) in "
+        f"{time.perf_counter() - batch_start:.3f}s"
+    )
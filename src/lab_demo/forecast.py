@@ -4,7 +4,6 @@ import os
 import pathlib
 
 import datetime as dt
-import pandas as pd
 
 
 class SalesForecast:
@@ -13,6 +12,10 @@ class SalesForecast:
         self,
         file_path: str):
         
+        # pandas is slow to import, so only pull it in once we have a forecast
+        # to read rather than on `import lab_demo`
+        import pandas as pd
+        
         _base_path = pathlib.Path(__file__).parent.resolve()
         _fake_upload_path = os.path.join(
             _base_path, 
@@ -25,6 +28,8 @@ class SalesForecast:
         
     def interpolate_forecast(self):
         
+        import pandas as pd
+        
         self.forecast = self.base_forecast.copy()
         
         _columns = self.forecast.columns
@@ -49,7 +54,9 @@ class SalesForecast:
         today = dt.date.today()
         days_to_add = 7 - today.weekday()
         next_monday = today + dt.timedelta(days=days_to_add)
-        date_range = pd.date_range(start=next_monday, periods=6, freq='W-MON')
+        date_range = pd.date_range(
+            start=next_monday, periods=len(self.forecast), freq='W-MON'
+        )
         
         self.forecast = self.forecast.set_index(date_range)
         
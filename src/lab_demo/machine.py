@@ -1,5 +1,6 @@
 from lab_demo.config import Config
 from lab_demo.products import Product
+from lab_demo.shift_calendar import ShiftCalendar
 
 
 class Machine:
@@ -11,7 +12,8 @@ class Machine:
         self,
         machine_id: int,
         shift_pattern: str,
-        config: Config = Config()
+        config: Config = Config(),
+        calendar: ShiftCalendar = None
     ):
         
         if machine_id in self.seen_machine_ids:
@@ -27,6 +29,13 @@ class Machine:
             raise ValueError("Shift pattern not recognised!")
         
         self.shift_pattern = self.config.SHIFT_PATTERNS[shift_pattern]
+        
+        # Optionally override the shift pattern with a calendar of our own
+        # e.g. for breaks that don't fall on the hour
+        if calendar is not None and not isinstance(calendar, ShiftCalendar):
+            raise TypeError("Not a valid calendar!")
+        
+        self.calendar = calendar
         self.hourly_production = (
             self.config.MACHINE_STATS[machine_id]['ideal_run_rate']
         )
@@ -1,13 +1,11 @@
 from lab_demo import SalesForecast
 
-import pandas as pd
-
 
 class Problem:
     
     def __init__(self):
         self.machines = []
-        self.forecast = pd.DataFrame()
+        self.forecast = None
         self._is_built = False
         self._payload = {}
         
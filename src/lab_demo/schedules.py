@@ -0,0 +1,144 @@
+'''
+Cooling schedules for the simulated annealing in Solver.
+
+A schedule is told about the outcome of every iteration and hands back the
+temperature to use for the next one. The Solver only ever talks to a schedule
+through `start` and `update`, so new schedules can be dropped in without
+touching the annealing loop.
+'''
+
+from math import exp, log
+
+
+class CoolingSchedule:
+
+    def start(self, temperature, iterations):
+        """ Reset any state ahead of a run and return the first temperature """
+        return temperature
+
+    def update(self, temperature, uphill, accepted, new_best):
+        """ Return the temperature for the next iteration
+
+        uphill is whether the proposed move would have made the solution
+        worse (i.e. whether the temperature had any say in accepting it),
+        accepted is whether we took the move and new_best is whether it gave us
+        our best ever solution.
+        """
+        raise NotImplementedError
+
+
+class GeometricSchedule(CoolingSchedule):
+    """ The classic fixed schedule; multiply by cooling_rate each iteration """
+
+    def __init__(self, cooling_rate):
+        self.cooling_rate = cooling_rate
+
+    def update(self, temperature, uphill, accepted, new_best):
+        return temperature * self.cooling_rate
+
+
+class BudgetSchedule(CoolingSchedule):
+    """ Geometric cooling that stretches to fit the iteration budget
+
+    Rather than picking a cooling rate by hand (and freezing after a few dozen
+    iterations on a long run), the rate is worked out when the run starts so
+    that the temperature lands on final_ratio * starting temperature on the
+    last iteration, however many iterations that is.
+    """
+
+    def __init__(self, final_ratio=0.001):
+        self.final_ratio = final_ratio
+        self.cooling_rate = 1
+
+    def start(self, temperature, iterations):
+        self.cooling_rate = self.final_ratio ** (1 / max(iterations, 1))
+        return temperature
+
+    def update(self, temperature, uphill, accepted, new_best):
+        return temperature * self.cooling_rate
+
+
+class AdaptiveSchedule(CoolingSchedule):
+    """ Tune the temperature to hit a target acceptance rate of uphill moves
+
+    The target acceptance rate decays geometrically from initial_acceptance to
+    final_acceptance over the run. Every `window` uphill moves we compare the
+    fraction of them we actually accepted against the target and nudge
+    the temperature up or down by `adjustment` to close the gap. This means
+    the schedule doesn't need to know anything about the scale of the costs.
+
+    If we go `stagnation_iterations` without finding a new best solution, the
+    temperature is multiplied by `reheat_factor` to shake us out of whatever
+    hole we're stuck in.
+    """
+
+    def __init__(
+        self,
+        initial_acceptance=0.5,
+        final_acceptance=0.01,
+        window=50,
+        adjustment=1.5,
+        stagnation_iterations=2000,
+        reheat_factor=10
+    ):
+        self.initial_acceptance = initial_acceptance
+        self.final_acceptance = final_acceptance
+        self.window = window
+        self.adjustment = adjustment
+        self.stagnation_iterations = stagnation_iterations
+        self.reheat_factor = reheat_factor
+
+        self.reheats = 0
+        self._iterations = 0
+        self._iteration = 0
+        self._uphill = 0
+        self._uphill_accepted = 0
+        self._since_best = 0
+
+    def start(self, temperature, iterations):
+        self.reheats = 0
+        self._iterations = max(iterations, 1)
+        self._iteration = 0
+        self._uphill = 0
+        self._uphill_accepted = 0
+        self._since_best = 0
+        return temperature
+
+    def target_acceptance(self):
+        progress = self._iteration / self._iterations
+        return self.initial_acceptance * exp(
+            progress
+            * log(self.final_acceptance / self.initial_acceptance)
+        )
+
+    def update(self, temperature, uphill, accepted, new_best):
+
+        self._iteration += 1
+
+        if uphill:
+            self._uphill += 1
+            if accepted:
+                self._uphill_accepted += 1
+
+        if new_best:
+            self._since_best = 0
+        else:
+            self._since_best += 1
+
+        if self._since_best >= self.stagnation_iterations:
+            self._since_best = 0
+            self.reheats += 1
+            return temperature * self.reheat_factor
+
+        # Only adjust once we've seen enough uphill moves to have a
+        # meaningful acceptance rate
+        if self._uphill >= self.window:
+            acceptance = self._uphill_accepted / self._uphill
+            if acceptance < self.target_acceptance():
+                temperature *= self.adjustment
+            else:
+                temperature /= self.adjustment
+            self._uphill = 0
+            self._uphill_accepted = 0
+
+        return temperature
@@ -0,0 +1,192 @@
+'''
+Shift calendars stored as runs of (start, end, rate) rather than one value per
+time slot.
+
+Time is measured in slots, and there are slots_per_hour of them in an hour
+(4 for 15 minute resolution). A calendar only stores the runs where a machine
+is productive, so its size depends on the number of shift changes rather than
+on the number of slots. Anything outside of a run has a rate of 0.
+'''
+
+from math import ceil
+
+import numpy as np
+
+
+class ShiftCalendar:
+
+    def __init__(
+        self,
+        intervals,
+        num_slots,
+        slots_per_hour = 1
+    ):
+        """
+        intervals is an iterable of (start_slot, end_slot, rate), where rate is
+        the fraction of the machine's hourly production it can make during the
+        run e.g. 1 when it's running flat out and 0.5 if there's a break.
+
+        When the calendar is given to a Machine, num_slots must cover exactly
+        the forecast horizon i.e. (len(forecast) - 1) * slots_per_hour, as we
+        don't get the last hour of the forecast.
+        """
+
+        self.num_slots = num_slots
+        self.slots_per_hour = slots_per_hour
+        self.num_hours = ceil(num_slots / slots_per_hour)
+
+        starts, ends, rates = [], [], []
+        for start, end, rate in sorted(intervals):
+            start = max(start, 0)
+            end = min(end, num_slots)
+            if end <= start or rate == 0:
+                continue
+
+            if starts and start < ends[-1]:
+                raise ValueError("Calendar intervals must not overlap!")
+
+            # Merge touching runs so we don't store more than we need to
+            if starts and start == ends[-1] and rate == rates[-1]:
+                ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+                rates.append(rate)
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.rates = np.array(rates, dtype=np.float64)
+
+        # Cumulative output at the start and end of each run, so that we can
+        # find the output between any two slots by interpolation
+        run_output = self.rates * (self.ends - self.starts)
+        self._breakpoints = np.column_stack(
+            (self.starts, self.ends)
+        ).ravel()
+        self._cumulative_output = np.column_stack(
+            (
+                run_output.cumsum() - run_output,
+                run_output.cumsum()
+            )
+        ).ravel()
+
+    @classmethod
+    def from_shift_pattern(
+        cls,
+        shift_pattern,
+        num_hours,
+        slots_per_hour = 1
+    ):
+        """ Build a calendar from one of Config.SHIFT_PATTERNS
+
+        The pattern covers a single week of hours, so we run-length encode
+        that and repeat it for as many weeks as we need.
+        """
+
+        week = []
+        for day in sorted(shift_pattern):
+            week.extend(shift_pattern[day])
+
+        week_runs = []
+        hour = 0
+        while hour < len(week):
+            end = hour
+            while end < len(week) and week[end] == week[hour]:
+                end += 1
+            week_runs.append((hour, end, week[hour]))
+            hour = end
+
+        intervals = []
+        for week_number in range(ceil(num_hours / len(week))):
+            offset = week_number * len(week)
+            for start, end, rate in week_runs:
+                intervals.append(
+                    (
+                        (offset + start) * slots_per_hour,
+                        (offset + end) * slots_per_hour,
+                        rate
+                    )
+                )
+
+        return cls(intervals, num_hours * slots_per_hour, slots_per_hour)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        return (
+            f"<ShiftCalendar. Runs: {len(self)}, Slots: {self.num_slots}, "
+            f"Slots per hour: {self.slots_per_hour}>"
+        )
+
+    def hourly_output(
+        self,
+        start,
+        end
+    ):
+        """ Fraction of each hour's production made between two slots
+
+        Returns the first hour touched and an array with one value for each
+        hour from there. Over the whole calendar, this is the same as the
+        hourly values in Config.SHIFT_PATTERNS.
+        """
+
+        start = max(start, 0)
+        end = min(end, self.num_slots)
+
+        first_hour = start // self.slots_per_hour
+        last_hour = ceil(end / self.slots_per_hour)
+
+        edges = np.clip(
+            np.arange(first_hour, last_hour + 1) * self.slots_per_hour,
+            start,
+            end
+        )
+        if not len(self):
+            return first_hour, np.zeros(len(edges) - 1)
+
+        cumulative = np.interp(
+            edges, self._breakpoints, self._cumulative_output
+        )
+
+        return first_hour, np.diff(cumulative) / self.slots_per_hour
+
+    def to_hourly(self):
+        """ One value per hour, for anything that still needs a dense array """
+        return self.hourly_output(0, self.num_slots)[1]
+
+    def block_starts(self, block_slots):
+        """ Slots where a block of production can start
+
+        Blocks start at the first productive slot that isn't already covered
+        by the previous block. We walk the runs rather than every slot.
+        """
+
+        starts = []
+        covered_until = 0
+
+        for run_start, run_end in zip(self.starts, self.ends):
+            slot = max(int(run_start), covered_until)
+            while slot < run_end:
+                starts.append(slot)
+                covered_until = slot + block_slots
+                slot = covered_until
+
+        return starts
+
+    def with_outage(
+        self,
+        start,
+        end
+    ):
+        """ A copy of the calendar with nothing available between two slots """
+
+        intervals = []
+        runs = zip(self.starts, self.ends, self.rates)
+        for run_start, run_end, rate in runs:
+            if run_start < start:
+                intervals.append((run_start, min(run_end, start), rate))
+            if run_end > end:
+                intervals.append((max(run_start, end), run_end, rate))
+
+        return ShiftCalendar(intervals, self.num_slots, self.slots_per_hour)
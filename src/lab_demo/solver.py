@@ -1,21 +1,26 @@
 from .config import Config
+from .schedules import GeometricSchedule
+from .shift_calendar import ShiftCalendar
 from .util import chunk
 
-from math import exp
+from math import ceil, exp, floor
 
 import random
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-
-
-# For testing so our CSVs will line up
-np.random.seed(42)
 
 
 class Solver:
     
+    # The neighbourhood moves we know how to make. See the _do_* methods
+    MOVE_TYPES = ('reassign', 'exchange', 'shift', 'swap')
+    DEFAULT_MOVE_PROBABILITIES = {
+        'reassign': 0.4,
+        'exchange': 0.2,
+        'shift': 0.2,
+        'swap': 0.2
+    }
+    
     def __init__(
         self,
         problem,
@@ -24,16 +29,38 @@ class Solver:
         cooling_rate,
         turn_off_pct,
         min_swap_hours = 8,
+        slots_per_hour = 1,
         overproduction_penalty = 1,
         missed_production_penalty = 15,
+        seed = None,
+        write_csvs = True,
+        schedule = None,
+        move_probabilities = None,
+        gap_tolerance = None,
         config: Config = Config()
     ):
         self.problem = problem
         self.config = config
+        
+        # Keep our own random state rather than seeding the global one, so that
+        # passing the same seed will give us CSVs that line up between runs
+        self._rng = np.random.default_rng(seed)
+        self._random = random.Random(seed)
+        
+        # The intermediate CSVs are only useful for debugging, so headless runs
+        # can skip the disk writes (and the pandas import)
+        self.write_csvs = write_csvs
+        
         self._product_names = problem.forecast.columns
         self._forecast = self.problem.forecast.copy()
         self.min_swap_hours = min_swap_hours
         
+        # The resolution of the shift calendars and of where blocks can start
+        # e.g. 4 for 15 minutes. Demand and production are still costed hourly
+        self.slots_per_hour = slots_per_hour
+        self._block_slots = min_swap_hours * slots_per_hour
+        self._calendars = {}
+        
         # Input data containers
         self._demands = {}
         
@@ -52,20 +79,58 @@ class Solver:
         
         # Simulated annealing params
         self.temperature = temperature
+        self.initial_temperature = temperature
         self.cooling_rate = cooling_rate
         self.iterations = iterations
         self.turn_off_pct = turn_off_pct / 100
-        self.dice_rolls = np.random.random(size=self.iterations)
+        self.dice_rolls = self._rng.random(size=self.iterations)
+        
+        # Anything from lab_demo.schedules. Default to the plain geometric
+        # cooling driven by cooling_rate
+        if schedule is None:
+            schedule = GeometricSchedule(cooling_rate)
+        self.schedule = schedule
+        
+        # How often we try each kind of move. Doesn't need to sum to 1
+        if move_probabilities is None:
+            move_probabilities = self.DEFAULT_MOVE_PROBABILITIES
+        
+        for move_type in move_probabilities:
+            if move_type not in self.MOVE_TYPES:
+                raise ValueError(f"Move type: {move_type} not recognised!")
+            if move_probabilities[move_type] < 0:
+                raise ValueError(
+                    f"Move type: {move_type} has a negative probability!"
+                )
+        
+        total = sum(move_probabilities.values())
+        if total <= 0:
+            raise ValueError("At least one move type needs a probability!")
+        self.move_probabilities = {
+            move_type: probability / total
+            for move_type, probability in move_probabilities.items()
+        }
         
         # Algo params
         self.overproduction_penalty = overproduction_penalty
         self.missed_production_penalty = missed_production_penalty
         
+        # Stop as soon as the best solution is within this fraction of the
+        # lower bound e.g. 0.01 for 1%
+        self.gap_tolerance = gap_tolerance
+        self.lower_bound = 0
+        self.iterations_run = 0
+        
         # Swaps
         self._machine_swaps = []
         self._product_swaps = []
         self._possible_swap_indices = {}
+        self._block_outputs = {}
         self._swap_indices = []
+        self._move_types = []
+        self._exchange_partners = {}
+        self._move_stats = {}
+        self._reset_move_stats()
         
         # Solutions
         self._solution = {}
@@ -73,9 +138,19 @@ class Solver:
         self._best_ever_cost = np.inf
         self._solution_costs = []
         self._product_cost_contributions = {}
+        self._cost_prefixes = {}
         self._production_map = {}
         
         self._solved = False
+    
+    def _write_csv(self, data, file_name, **kwargs):
+        
+        if not self.write_csvs:
+            return
+        
+        import pandas as pd
+        
+        pd.DataFrame(data).to_csv(file_name, **kwargs)
                
     def _disaggregate_forecast(self):
         """
@@ -96,8 +171,9 @@ class Solver:
                 machine.hourly_production
             )
             
-        df = pd.DataFrame(self._productivity_map)
-        df.to_csv('initial_productivity_map.csv', index=False)
+        self._write_csv(
+            self._productivity_map, 'initial_productivity_map.csv', index=False
+        )
         
         # Initialise the actual PRODUCTION to be zeros while we're here
         # So far we haven't assigned the machine to any product
@@ -107,35 +183,42 @@ class Solver:
                 dtype=np.float64
             )
 
-        self._forecast.to_csv('forecast.csv')
+        self._write_csv(self._forecast, 'forecast.csv')
         
-        # Now we need to overlay the shift patterns. They need to be expanded
-        # out because they only cover a single week
+        # Now we need to overlay the shift patterns. These are kept as runs of
+        # (start, end, rate) so that they don't grow with the resolution, and
+        # we only expand them out to hours here. When the machine is on, you
+        # multiply by 1 and otherwise it gets multiplied by 0. If there is a
+        # half hour break in between, then productivity is multiplied by 0.5
         for machine in self.problem.machines:
-            shift = []
-            week_shift = machine.shift_pattern
-            # First flatten the dictionary to give us a single week
-            for k, v in week_shift.items():
-                shift.extend(v)
-            
-            # Now extend for the total number of weeks
-            num_weeks = int(len(self._forecast) / len(shift))
-            week_shift = shift.copy()
-            for x in range(num_weeks - 1): # We already have the first week
-                shift += week_shift
+            calendar = machine.calendar
+            if calendar is None:
+                calendar = ShiftCalendar.from_shift_pattern(
+                    machine.shift_pattern,
+                    len(self._forecast) - 1,
+                    self.slots_per_hour
+                )
+            elif calendar.slots_per_hour != self.slots_per_hour:
+                raise ValueError(
+                    f"Calendar for machine {machine.id} doesn't match "
+                    f"slots_per_hour!"
+                )
+            elif calendar.num_slots != (
+                (len(self._forecast) - 1) * self.slots_per_hour
+            ):
+                raise ValueError(
+                    f"Calendar for machine {machine.id} doesn't cover the "
+                    f"forecast horizon!"
+                )
             
-            # Now prune down the machine productivity. We use the shift pattern
-            # as a mask over the previous array simply through multiplication.
-            # When the machine is on, you multiply by 1 and otherwise it gets
-            # multiplied by 0. If there is a half hour break in between, then
-            # productivity is multiplied by 0.5 etc.
-            shift = np.array(shift)
+            self._calendars[machine.id] = calendar
             self._productivity_map[machine.id] = (
-                (self._productivity_map[machine.id] * shift).astype(np.float64)
+                calendar.to_hourly() * machine.hourly_production
             )
             
-        df = pd.DataFrame(self._productivity_map)
-        df.to_csv('productivity_map.csv', index=False)
+        self._write_csv(
+            self._productivity_map, 'productivity_map.csv', index=False
+        )
 
     def _create_product_swap_map(self):
         
@@ -143,6 +226,16 @@ class Solver:
             self._machine_product_map[machine.id] = [
                 product.name for product in machine._products
             ]
+        
+        # Machines that have at least one product in common can trade blocks
+        product_map = self._machine_product_map
+        for machine_id, products in product_map.items():
+            self._exchange_partners[machine_id] = [
+                other_id
+                for other_id, other_products in product_map.items()
+                if other_id != machine_id
+                and set(products).intersection(other_products)
+            ]
             
     def _find_swap_indices(self):
         """ Return list of swappable indices for each machine 
@@ -156,21 +249,26 @@ class Solver:
         (useless) in addition to giving product swaps at weird intervals e.g.
         one hour into a shift. This method is not without its flaws - it relies
         on shifts being generally regular in rotation. This is generally true.
+        
+        The indices are slots, found by walking the runs in each calendar. We
+        also work out the hourly output of every block up front, because it
+        never changes and it's all we need to price a move.
         """
         
-        for machine_id, productivity in self._productivity_map.items():
+        for machine in self.problem.machines:
             
-            starts = []
-            arr = productivity.nonzero()[0].tolist()
-            seen_indices = set()
+            calendar = self._calendars[machine.id]
+            starts = calendar.block_starts(self._block_slots)
+            self._possible_swap_indices[machine.id] = starts
             
-            for index in arr:
-                if index not in seen_indices:
-                    starts.append(index)
-                    seen_indices.update(
-                        list(range(index, index + self.min_swap_hours))
-                    )
-            self._possible_swap_indices[machine_id] = starts
+            self._block_outputs[machine.id] = []
+            for start in starts:
+                first_hour, output = calendar.hourly_output(
+                    start, start + self._block_slots
+                )
+                self._block_outputs[machine.id].append(
+                    (first_hour, output * machine.hourly_production)
+                )
         
     def _create_swaps(self):
         
@@ -179,66 +277,115 @@ class Solver:
         # quicker than calling random() on every iteration, so we can throw 
         # them away
         
-        self._machine_swaps = np.random.choice(
+        self._machine_swaps = self._rng.choice(
             list(self._productivity_map.keys()), self.iterations, replace=True
         )
         
+        self._move_types = self._rng.choice(
+            list(self.move_probabilities.keys()),
+            self.iterations,
+            p=list(self.move_probabilities.values())
+        )
+        
         # Product swaps are more difficult. Since the machine is not
         # specifically pre-determined, we need to iterate this one :(
         # We should actually calculate this in the solver loop itself because
-        # of this, but it's cognitively simpler to do it here for the demo
+        # of this, but it's cognitively simpler to do it here for the demo.
+        # They are only used by "reassign" moves; the others take their
+        # products from the current solution
+        self._product_swaps = []
+        self._swap_indices = []
         for machine_id in self._machine_swaps:
             possible_products = self._machine_product_map[machine_id]
-            if random.random() < self.turn_off_pct:
+            if self._random.random() < self.turn_off_pct:
                 self._product_swaps.append(0)
             else:
-                product = random.choice(possible_products)
+                product = self._random.choice(possible_products)
                 self._product_swaps.append(product)
         
-            # Now find where we want to put the product
-            production_start = random.choice(
-                self._possible_swap_indices[machine_id]
+            # Now find where we want to put the product. We keep the position
+            # of the block rather than its start slot
+            block = self._random.randrange(
+                len(self._possible_swap_indices[machine_id])
             )
-            self._swap_indices.append(production_start)
+            self._swap_indices.append(block)
             
     def _create_initial_solution(self):
         """
         Generate a random starting solution
+        
+        The solution holds one product per block rather than per hour, so it
+        doesn't grow with the resolution either. See get_solution for
+        something more readable.
         """
         
-        for machine_id, _ in self._productivity_map.items():
+        for machine_id, starts in self._possible_swap_indices.items():
             self._solution[machine_id] = np.full(
-                len(self._forecast), "",
+                len(starts), "",
                 dtype="U20"
             )
             
-            for index in self._possible_swap_indices[machine_id]:
-                
-                product = random.choice(self._machine_product_map[machine_id])
-
-                hour_block = self.min_swap_hours
+            for block, (first_hour, output) in enumerate(
+                self._block_outputs[machine_id]
+            ):
                 
-                self._solution[machine_id][index:index+hour_block] = (
-                    product
+                product = self._random.choice(
+                    self._machine_product_map[machine_id]
                 )
                 
-                self._production_map[product][index:index+hour_block] += (
-                    self._machine_irr[machine_id]['ideal_run_rate']
-                )
+                self._solution[machine_id][block] = product
+                self._production_map[product][
+                    first_hour:first_hour+len(output)
+                ] += output
         
-        df = pd.DataFrame(self._production_map)
-        df.to_csv('initial_solution_production_map.csv')
+        self._write_csv(
+            self._production_map, 'initial_solution_production_map.csv'
+        )
         
         # Now need to cumsum up the production
         for product, production in self._production_map.items():
             self._production_map[product] = production.cumsum()
             
-        df = pd.DataFrame(self._production_map)
-        df.to_csv('cumulative_production.csv', index=False)
+        self._write_csv(
+            self._production_map, 'cumulative_production.csv', index=False
+        )
         
         # For human readability
-        df = pd.DataFrame(self._solution)
-        df.to_csv("solution.csv", index=False)
+        self._write_csv(
+            self._expand_solution(self._solution), "solution.csv", index=False
+        )
+    
+    def _expand_solution(self, solution):
+        """ One product per slot for every machine, from one per block """
+        
+        expanded = {}
+        
+        for machine_id, products in solution.items():
+            expanded[machine_id] = np.full(
+                len(self._forecast) * self.slots_per_hour, "",
+                dtype="U20"
+            )
+            starts = self._possible_swap_indices[machine_id]
+            for start, product in zip(starts, products):
+                expanded[machine_id][start:start+self._block_slots] = product
+        
+        return expanded
+    
+    def get_solution(self):
+        """ The best solution found, with one product per slot """
+        
+        if not self._solved:
+            raise RuntimeError("Problem has not been solved!")
+        
+        return self._expand_solution(self._best_ever_solution)
+    
+    def get_best_cost(self):
+        """ The cost of the best solution found """
+        
+        if not self._solved:
+            raise RuntimeError("Problem has not been solved!")
+        
+        return self._best_ever_cost
         
     def _get_initial_solution_cost(self):
         
@@ -248,28 +395,116 @@ class Solver:
             production = self._production_map[product]
             cost = self.get_cost(product, production)
             self._product_cost_contributions[product] = cost
+            self._update_cost_prefix(product)
             total_cost += cost
         
         return total_cost
+    
+    def _update_cost_prefix(self, product):
+        """ Cache the cost of each product's production before every hour
+        
+        When we price a move, everything before the first block we touch is
+        unchanged, so we can look its cost up here instead of recalculating it.
+        """
+        
+        shortfall = self._demands[product] - self._production_map[product]
+        hourly_costs = (
+            np.maximum(shortfall, 0) * self.missed_production_penalty
+            + np.maximum(-shortfall, 0) * self.overproduction_penalty
+        )
+        
+        self._cost_prefixes[product] = np.concatenate(
+            ([0], hourly_costs.cumsum())
+        )
+        
+    def _get_lower_bound(self):
+        """ A cheap lower bound on the cost of any solution
+        
+        We relax the problem so that every machine can split its time between
+        all of its products however it likes, and nobody ever has to
+        overproduce. Each product then can't have made more than the
+        cumulative capacity of the machines that can make it, and all the
+        products together can't have made more than the cumulative capacity of
+        all the machines. Whatever demand is left over has to be missed.
+        """
+        
+        horizon = len(self._forecast)
+        product_capacity = {
+            product: np.zeros(horizon) for product in self._demands
+        }
+        total_capacity = np.zeros(horizon)
+        
+        for machine_id, products in self._machine_product_map.items():
+            if not products:
+                continue
+            
+            productivity = self._productivity_map[machine_id]
+            total_capacity[:len(productivity)] += productivity
+            for product in products:
+                product_capacity[product][:len(productivity)] += productivity
+        
+        total_capacity = total_capacity.cumsum()
+        
+        product_shortfall = np.zeros(horizon)
+        total_demand = np.zeros(horizon)
+        for product, demand in self._demands.items():
+            product_shortfall += np.maximum(
+                demand - product_capacity[product].cumsum(), 0
+            )
+            total_demand += demand
+        
+        missed_production = np.maximum(
+            product_shortfall, total_demand - total_capacity
+        )
+        
+        return missed_production.sum() * self.missed_production_penalty
+    
+    def get_gap(self):
+        """ How far the best solution could be from optimal, as a fraction """
+        
+        if not self._solved:
+            raise RuntimeError("Problem has not been solved!")
+        
+        return self._get_gap()
+    
+    def _get_gap(self):
+        
+        if self._best_ever_cost <= 0:
+            return 0
+        
+        return (
+            max(self._best_ever_cost - self.lower_bound, 0)
+            / self._best_ever_cost
+        )
         
     def get_cost(
         self,
         product,
-        production
+        production,
+        start = 0
     ):
+        """ Cost of the cumulative production of a product
+        
+        If start is given, production only covers the hours from start onwards
+        and we only cost those hours.
+        """
         cost = 0
         
-        demand = self._demands[product]
+        demand = self._demands[product][start:]
+        
+        # This gets called a lot, so use np.maximum rather than .clip(), which
+        # has a surprising amount of Python overhead on arrays this size
+        shortfall = demand - production
         
         missed_production = (
-            (demand - production).clip(0).sum() 
+            np.maximum(shortfall, 0).sum()
             * self.missed_production_penalty
         )
         
         cost += missed_production
         
         overproduction = (
-            (production - demand).clip(0).sum() 
+            np.maximum(-shortfall, 0).sum()
             * self.overproduction_penalty
         )
         
@@ -277,99 +512,268 @@ class Solver:
         
         return cost
     
-    def _do_swap(
+    @staticmethod
+    def _is_off(product):
+        
+        # TODO this is bad design on the fact I have ints and strings coming
+        # through here but no time yet to see where this happens
+        return product == 0 or product == '0'
+    
+    def _can_make(
         self,
         machine,
-        start_index,
-        new_product
+        product
     ):
+        return (
+            self._is_off(product)
+            or product in self._machine_product_map[machine]
+        )
+    
+    def _price_assignments(
+        self,
+        assignments
+    ):
+        """ Price putting new products on a set of blocks
+        
+        assignments is a list of (machine, block, new_product) and every move
+        is just a different way of choosing them. Nothing before the earliest
+        hour we touch can change, so neither can its contribution to the cost.
+        We only rebuild (and re-cost) the cumulative production from there
+        onwards rather than for the whole horizon.
+        """
         
         # Payload we want to send back
-        rtn = {}
+        rtn = {
+            'productions': {},
+            'cost_contribs': {},
+            'assignments': assignments,
+            'cost_movement': 0
+        }
+        
+        # The hourly output of each block, which we worked out from the runs
+        # in its calendar up front
+        outputs = [
+            self._block_outputs[machine][block]
+            for machine, block, _ in assignments
+        ]
+        lo = min(first_hour for first_hour, _ in outputs)
+        hi = max(first_hour + len(output) for first_hour, output in outputs)
+        
+        # Hourly (NOT cumulative) change in production between lo and hi
+        hourly_deltas = {}
+        
+        for (machine, block, new_product), (first_hour, output) in zip(
+            assignments, outputs
+        ):
+            
+            current_product = self._solution[machine][block]
+            hours = slice(first_hour - lo, first_hour - lo + len(output))
+            
+            # Production lost from one product is gained by another
+            for product, sign in ((current_product, -1), (new_product, 1)):
+                if self._is_off(product):
+                    continue
+                if product not in hourly_deltas:
+                    hourly_deltas[product] = np.zeros(hi - lo)
+                hourly_deltas[product][hours] += sign * output
+        
+        for product, hourly_delta in hourly_deltas.items():
+            
+            cumulative_delta = hourly_delta.cumsum()
+            
+            new_production = self._production_map[product][lo:].copy()
+            new_production[:hi-lo] += cumulative_delta
+            new_production[hi-lo:] += cumulative_delta[-1]
+            
+            new_cost = (
+                self._cost_prefixes[product][lo]
+                + self.get_cost(product, new_production, lo)
+            )
+            
+            rtn['cost_movement'] += (
+                new_cost - self._product_cost_contributions[product]
+            )
+            rtn['productions'][product] = (lo, new_production)
+            rtn['cost_contribs'][product] = new_cost
+        
+        return rtn
+    
+    def _do_swap(
+        self,
+        machine,
+        block,
+        new_product
+    ):
+        """ Re-assign one block on one machine to another product (or off) """
         
         # First add a short-circuit. If we're already making Product_1 and we 
         # want to swap to Product_1 then that's pointless, so break out
-        current_product = self._solution[machine][start_index]
-        if new_product == current_product:
+        current_product = self._solution[machine][block]
+        if new_product == current_product or (
+            self._is_off(new_product) and self._is_off(current_product)
+        ):
             return
         
-        # Initialise both just incase either the old or the new product is "0"
-        swap_out_cost = 0
-        swap_in_cost = 0
+        return self._price_assignments([(machine, block, new_product)])
+    
+    def _do_exchange(
+        self,
+        machine,
+        block
+    ):
+        """ Trade a block with a block on another machine
         
-        # Does this swap improve or degrade our solution?
-        cost_movement = 0
+        Both machines must be able to make the product they are being given,
+        which lets us rebalance production between machines in a single move.
+        """
         
-        machine_solution = self._solution[machine].copy()
+        partners = self._exchange_partners[machine]
+        if not partners:
+            return
         
-        # The end of the slice we want to look at
-        shift_end = start_index + self.min_swap_hours
+        other_machine = self._random.choice(partners)
+        other_block = self._random.randrange(
+            len(self._possible_swap_indices[other_machine])
+        )
         
-        # Find the machine PRODUCTIVITY for the shift we want to swap
-        shift_prod = self._productivity_map[machine][start_index:shift_end]
+        product = self._solution[machine][block]
+        other_product = self._solution[other_machine][other_block]
         
-        # Find the total PRODUCTION that will be lost from one product to 
-        # be gained by another, by changing this machine's schedule
-        hourly_prod = shift_prod.cumsum()
-        total_prod = shift_prod.sum()
+        if product == other_product:
+            return
         
-        # TODO this is bad design on the fact I have ints and strings coming
-        # through here but no time yet to see where this happens
-        if current_product != 0 and current_product != '0':
-            
-            # Make sure we don't trample our global state in case we don't want 
-            # to accept this new solution
-            current_prod_production = (
-                self._production_map[current_product].copy()
-            )
-                    
-            # First snip out the PRODUCTION from the existing product
-            current_prod_production[start_index:shift_end] -= hourly_prod
-            current_prod_production[start_index+shift_end:] -= total_prod
-            
-            # Find the new solution cost for this loss of productivity
-            swap_out_cost = self.get_cost(
-                current_product,
-                current_prod_production
-            )
-            current_prod_existing_cost = (
-                self._product_cost_contributions[current_product]
-            )
-            
-            cost_movement += swap_out_cost - current_prod_existing_cost
-            
-            rtn['current_prod_production'] = current_prod_production
-            rtn['current_prod_cost_contrib'] = swap_out_cost
-            rtn['current_product'] = current_product
-            
+        if not (
+            self._can_make(machine, other_product)
+            and self._can_make(other_machine, product)
+        ):
+            return
+        
+        return self._price_assignments([
+            (machine, block, other_product),
+            (other_machine, other_block, product)
+        ])
+    
+    def _do_shift(
+        self,
+        machine,
+        block
+    ):
+        """ Move the run of a product containing this block by one block
+        
+        The run takes over the block next to it (earlier or later at random),
+        and whatever was in that block moves to the other end of the run.
+        """
+        
+        solution = self._solution[machine]
+        product = solution[block]
+        if self._is_off(product):
+            return
+        
+        first = last = block
+        
+        # Find the extent of the run
+        while first > 0 and solution[first - 1] == product:
+            first -= 1
+        while last < len(solution) - 1 and solution[last + 1] == product:
+            last += 1
+        
+        if self._random.random() < 0.5:
+            # Earlier
+            if first == 0:
+                return
+            taken_block, vacated_block = first - 1, last
         else:
-            rtn['current_product'] = 0
+            # Later
+            if last == len(solution) - 1:
+                return
+            taken_block, vacated_block = last + 1, first
         
-        if new_product != 0 and new_product != "0":
-            
-            new_prod_production = self._production_map[new_product].copy()
-
-            # Now add in the production of the new product
-            new_prod_production[start_index:shift_end] += hourly_prod
-            new_prod_production[start_index+shift_end:] += total_prod
-            
-            swap_in_cost = self.get_cost(new_product, new_prod_production)
-            new_prod_existing_cost = (
-                self._product_cost_contributions[new_product]
-            )
-
-            cost_movement += swap_in_cost - new_prod_existing_cost
-            
-            rtn['new_prod_production'] = new_prod_production
-            rtn['new_prod_cost_contrib'] = swap_in_cost
+        displaced_product = solution[taken_block]
+        
+        return self._price_assignments([
+            (machine, taken_block, product),
+            (machine, vacated_block, displaced_product)
+        ])
+    
+    def _do_block_swap(
+        self,
+        machine,
+        block
+    ):
+        """ Swap the products of two blocks on the same machine """
+        
+        other_block = self._random.randrange(
+            len(self._possible_swap_indices[machine])
+        )
+        
+        product = self._solution[machine][block]
+        other_product = self._solution[machine][other_block]
+        
+        if product == other_product:
+            return
+        
+        return self._price_assignments([
+            (machine, block, other_product),
+            (machine, other_block, product)
+        ])
+    
+    def _apply_change(
+        self,
+        change
+    ):
+        """ Commit a change from _price_assignments into our global state """
+        
+        for product, (lo, production) in change['productions'].items():
+            self._production_map[product][lo:] = production
+            self._update_cost_prefix(product)
             
-        # Reflect the change in the solution itself
-        machine_solution[start_index:shift_end] = new_product
+        self._product_cost_contributions.update(change['cost_contribs'])
         
-        rtn['new_solution'] = machine_solution
-        rtn['cost_movement'] = cost_movement
+        # Reflect the change in the solution itself. Copy rather than edit the
+        # arrays in place, because our best ever solution may still be
+        # pointing at the old ones
+        new_solutions = {}
+        for machine, block, new_product in change['assignments']:
+            if machine not in new_solutions:
+                new_solutions[machine] = self._solution[machine].copy()
+            new_solutions[machine][block] = new_product
         
-        return rtn
+        self._solution.update(new_solutions)
+    
+    def _reset_move_stats(self):
+        
+        self._move_stats = {
+            move_type: {
+                'proposed': 0,
+                'evaluated': 0,
+                'accepted': 0,
+                'improved': 0
+            }
+            for move_type in self.move_probabilities
+        }
+    
+    def get_move_stats(self):
+        """ How each type of move has fared, for tuning move_probabilities
+        
+        proposed is how many times we tried the move, evaluated is how many of
+        those were possible moves that we priced, accepted is how many we took
+        and improved is how many of those made the solution better. The counts
+        are for the most recent call to solve.
+        """
+        
+        move_stats = {}
+        
+        for move_type, stats in self._move_stats.items():
+            move_stats[move_type] = dict(stats)
+            move_stats[move_type]['probability'] = (
+                self.move_probabilities[move_type]
+            )
+            move_stats[move_type]['acceptance_rate'] = (
+                stats['accepted'] / stats['evaluated']
+                if stats['evaluated'] else 0
+            )
+        
+        return move_stats
         
     def solve(self):
         
@@ -379,50 +783,85 @@ class Solver:
         self._find_swap_indices()
         self._create_swaps()
         self._create_initial_solution()
+        self.lower_bound = self._get_lower_bound()
+        
+        # Start afresh if we've been solved before
+        self.iterations_run = 0
+        self._solution_costs = []
+        self._reset_move_stats()
         
         # Initialise our best solution and cost 
         self._best_ever_solution = self._solution.copy()
         self._best_ever_cost = self._get_initial_solution_cost()
         _current_cost = self._best_ever_cost
         
+        self.temperature = self.schedule.start(
+            self.initial_temperature, self.iterations
+        )
+        
         for x in range(self.iterations):
             
+            # No point carrying on if we're already close enough to optimal
+            if (
+                self.gap_tolerance is not None
+                and self._get_gap() <= self.gap_tolerance
+            ):
+                break
+            
+            self.iterations_run += 1
+            
             # First pick our machine to target in this atomic swap
             machine_swap = self._machine_swaps[x]
             
-            # Now find the start hour of the production we want to swap
-            hour = self._swap_indices[x]
+            # Now find the block of production we want to swap
+            block = self._swap_indices[x]
             
-            # Find the product we want to swap to
-            new_product = self._product_swaps[x]
+            move_type = self._move_types[x]
+            move_stats = self._move_stats[move_type]
+            move_stats['proposed'] += 1
             
-            change = self._do_swap(machine_swap, hour, new_product)
+            if move_type == 'reassign':
+                # Find the product we want to swap to
+                new_product = self._product_swaps[x]
+                change = self._do_swap(machine_swap, block, new_product)
+            elif move_type == 'exchange':
+                change = self._do_exchange(machine_swap, block)
+            elif move_type == 'shift':
+                change = self._do_shift(machine_swap, block)
+            else:
+                change = self._do_block_swap(machine_swap, block)
+            
+            uphill = False
+            accepted = False
+            new_best = False
             
             if change is not None:
+                move_stats['evaluated'] += 1
+                
                 if change['cost_movement'] < 0:
                     # Accept the solution unconditionally
+                    accepted = True
                     
-                    old_product = change['current_product']
-                    
-                    if old_product != 0:
-                        self._production_map[old_product] = (
-                            change['current_prod_production'].copy()
-                        )
-                        self._product_cost_contributions[old_product] = (
-                            change['current_prod_cost_contrib']
-                        )
+                else:
+                    # MAYBE accept the solution. A schedule is free to cool
+                    # all the way down to zero, at which point we're just
+                    # hill climbing
+                    uphill = True
+                    if self.temperature > 0:
+                        dice_roll = self.dice_rolls[x]
                         
-                    if new_product != 0:
-                        self._production_map[new_product] = (
-                            change['new_prod_production'].copy()
-                        )
-                        self._product_cost_contributions[new_product] = (
-                            change['new_prod_cost_contrib']
-                        )
+                        acceptance = exp(
+                            (-change['cost_movement'] / _current_cost ) * 100
+                          / self.temperature + 0.00001)
                         
-                    self._solution[machine_swap] = (
-                        change['new_solution'].copy()
-                    )
+                        accepted = dice_roll < acceptance
+                
+                if accepted:
+                    self._apply_change(change)
+                    move_stats['accepted'] += 1
+                    if change['cost_movement'] < 0:
+                        move_stats['improved'] += 1
+                    
                     _current_cost += change['cost_movement']
                     self._solution_costs.append([x, _current_cost])
                     
@@ -430,48 +869,180 @@ class Solver:
                     if _current_cost < self._best_ever_cost:
                         self._best_ever_cost = _current_cost
                         self._best_ever_solution = self._solution.copy()
+                        new_best = True
                     
-                else:
-                    # MAYBE accept the solution
-                    dice_roll = self.dice_rolls[x]
-                    
-                    acceptance = exp(
-                        (-change['cost_movement'] / _current_cost ) * 100
-                      / self.temperature + 0.00001)
-                    
-                    if dice_roll < acceptance:
-                        old_product = change['current_product']
-                        
-                        if old_product != 0:
-                            self._production_map[old_product] = (
-                                change['current_prod_production'].copy()
-                            )
-                            self._product_cost_contributions[old_product] = (
-                                change['current_prod_cost_contrib']
-                            )
-                            
-                        if new_product != 0:
-                            self._production_map[new_product] = (
-                                change['new_prod_production'].copy()
-                            )
-                            self._product_cost_contributions[new_product] = (
-                                change['new_prod_cost_contrib']
-                            )
-                            
-                        self._solution[machine_swap] = (
-                            change['new_solution'].copy()
-                        )
-                        _current_cost += change['cost_movement']
-                        self._solution_costs.append([x, _current_cost])
-                    
-            self.temperature *= self.cooling_rate
+            self.temperature = self.schedule.update(
+                self.temperature, uphill, accepted, new_best
+            )
         
         self._solved = True
             
+    def _rebuild_production_map(self):
+        """ Rebuild production and costs from scratch for the current solution
+        
+        Returns the total cost.
+        """
+        
+        for product in self._production_map:
+            self._production_map[product] = np.zeros(
+                len(self._forecast),
+                dtype=np.float64
+            )
+        
+        for machine_id, products in self._solution.items():
+            for block, product in enumerate(products):
+                if self._is_off(product):
+                    continue
+                first_hour, output = self._block_outputs[machine_id][block]
+                self._production_map[product][
+                    first_hour:first_hour+len(output)
+                ] += output
+        
+        for product, production in self._production_map.items():
+            self._production_map[product] = production.cumsum()
+        
+        return self._get_initial_solution_cost()
+    
+    def repair_outage(
+        self,
+        machine_id,
+        start_hour,
+        end_hour,
+        window_hours = 24,
+        iterations = 1000
+    ):
+        """ Patch the best solution after a machine goes down for a while
+        
+        Rather than re-solving from scratch, we knock the outage out of the
+        machine's calendar (and so its productivity), then only search the
+        blocks within window_hours either side of the outage, on the machine
+        itself and on any machine that shares a product with it. Only moves
+        that improve the solution are taken, so everything outside of that
+        window is left exactly as it was.
+        
+        The outage only applies to this Solver. The Problem and its machines
+        are left alone, so pass Machine(..., calendar=...) if a new Solver
+        should know about it.
+        
+        Hours can be fractional when working with slots_per_hour > 1. Returns
+        the repaired solution, as with get_solution.
+        """
+        
+        if not self._solved:
+            raise RuntimeError("Problem has not been solved!")
+        
+        if machine_id not in self._calendars:
+            raise ValueError(f"Machine ID: {machine_id} not recognised!")
+        
+        if end_hour <= start_hour:
+            raise ValueError("Outage must end after it starts!")
+        
+        if window_hours < 0:
+            raise ValueError("Window can't be negative!")
+        
+        machine = next(
+            machine for machine in self.problem.machines
+            if machine.id == machine_id
+        )
+        
+        # Round outwards, so that the whole outage is covered
+        start_slot = floor(start_hour * self.slots_per_hour)
+        end_slot = ceil(end_hour * self.slots_per_hour)
+        
+        # Take the outage out of the calendar and the productivity map
+        calendar = self._calendars[machine_id].with_outage(
+            start_slot, end_slot
+        )
+        self._calendars[machine_id] = calendar
+        
+        first_hour, output = calendar.hourly_output(
+            start_slot // self.slots_per_hour * self.slots_per_hour,
+            ceil(end_slot / self.slots_per_hour) * self.slots_per_hour
+        )
+        self._productivity_map[machine_id][
+            first_hour:first_hour+len(output)
+        ] = output * machine.hourly_production
+        
+        # Only blocks that overlap the outage make less than they used to
+        starts = self._possible_swap_indices[machine_id]
+        for block, start in enumerate(starts):
+            if start < end_slot and start + self._block_slots > start_slot:
+                block_hour, block_output = calendar.hourly_output(
+                    start, start + self._block_slots
+                )
+                self._block_outputs[machine_id][block] = (
+                    block_hour, block_output * machine.hourly_production
+                )
+        
+        # Pick up from the best solution rather than wherever annealing ended
+        self._solution = self._best_ever_solution.copy()
+        current_cost = self._rebuild_production_map()
+        self.lower_bound = self._get_lower_bound()
+        
+        # The blocks we're allowed to touch
+        window_start = start_hour - window_hours
+        window_end = end_hour + window_hours
+        candidates = []
+        for candidate_machine in [machine_id] + (
+            self._exchange_partners[machine_id]
+        ):
+            outputs = self._block_outputs[candidate_machine]
+            for block, (block_hour, block_output) in enumerate(outputs):
+                if (
+                    block_hour < window_end
+                    and block_hour + len(block_output) > window_start
+                ):
+                    candidates.append((candidate_machine, block))
+        
+        if candidates:
+            for _ in range(iterations):
+                
+                machine_swap, block = self._random.choice(candidates)
+                
+                if self._random.random() < 0.5:
+                    # Re-assign the block
+                    if self._random.random() < self.turn_off_pct:
+                        new_product = 0
+                    else:
+                        new_product = self._random.choice(
+                            self._machine_product_map[machine_swap]
+                        )
+                    change = self._do_swap(machine_swap, block, new_product)
+                else:
+                    # Trade with another block in the window, on this machine
+                    # or another one
+                    other_machine, other_block = self._random.choice(
+                        candidates
+                    )
+                    product = self._solution[machine_swap][block]
+                    other_product = self._solution[other_machine][other_block]
+                    
+                    change = None
+                    if product != other_product and (
+                        self._can_make(machine_swap, other_product)
+                        and self._can_make(other_machine, product)
+                    ):
+                        change = self._price_assignments([
+                            (machine_swap, block, other_product),
+                            (other_machine, other_block, product)
+                        ])
+                
+                if change is not None and change['cost_movement'] < 0:
+                    self._apply_change(change)
+                    current_cost += change['cost_movement']
+        
+        self._best_ever_solution = self._solution.copy()
+        self._best_ever_cost = current_cost
+        
+        return self.get_solution()
+    
     def plot_solution_convergence(self):
         
         if not self._solved:
             raise RuntimeError("Problem has not been solved!")
+        
+        # Only pay for matplotlib when somebody actually wants a plot
+        import matplotlib.pyplot as plt
                     
         iterations = [item[0] for item in self._solution_costs]
         costs = [item[1] for item in self._solution_costs]
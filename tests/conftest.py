@@ -0,0 +1,22 @@
+import pathlib
+import sys
+
+import pytest
+
+
+SRC_PATH = pathlib.Path(__file__).parent.parent.resolve() / 'src'
+DATA_PATH = SRC_PATH / 'lab_demo' / 'data_files'
+
+# Run against the source tree, whether or not the package is installed
+sys.path.insert(0, str(SRC_PATH))
+
+
+@pytest.fixture
+def problem():
+    """ The example forecast and machines that ship with the package """
+
+    from lab_demo.cli import load_problem
+
+    return load_problem(
+        DATA_PATH / 'sales_forecast.csv', DATA_PATH / 'machines.json'
+    )
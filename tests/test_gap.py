@@ -0,0 +1,49 @@
+'''
+gap_tolerance stops the search on the strength of lower_bound, so the bound has
+to really be a lower bound on the cost of any solution we can find.
+'''
+
+from lab_demo import Solver
+
+import pytest
+
+
+ITERATIONS = 3000
+
+
+def make_solver(problem, **kwargs):
+
+    return Solver(
+        problem=problem,
+        iterations=ITERATIONS,
+        temperature=10,
+        cooling_rate=0.99,
+        turn_off_pct=15,
+        write_csvs=False,
+        **kwargs
+    )
+
+
+@pytest.mark.parametrize('slots_per_hour', [1, 4])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_lower_bound_is_below_cost(problem, seed, slots_per_hour):
+
+    solver = make_solver(problem, seed=seed, slots_per_hour=slots_per_hour)
+    solver.solve()
+
+    assert 0 <= solver.get_gap() <= 1
+
+    solver._solution = solver._best_ever_solution.copy()
+    rebuilt_cost = solver._rebuild_production_map()
+
+    # The bound is tight on this problem, so allow for rounding
+    assert solver.lower_bound <= rebuilt_cost * (1 + 1e-9)
+
+
+def test_gap_tolerance_stops_early(problem):
+
+    solver = make_solver(problem, seed=0, gap_tolerance=0.01)
+    solver.solve()
+
+    assert solver.iterations_run < ITERATIONS
+    assert solver.get_gap() <= 0.01
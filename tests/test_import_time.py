@@ -0,0 +1,43 @@
+'''
+`import lab_demo` should stay cheap. pandas and matplotlib are only needed
+once a forecast is read or a plot is drawn, so they mustn't be imported at the
+top level of any module.
+'''
+
+import os
+import pathlib
+import subprocess
+import sys
+
+
+SRC_PATH = pathlib.Path(__file__).parent.parent.resolve() / 'src'
+
+
+def _run(code):
+
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [str(SRC_PATH), env.get('PYTHONPATH')])
+    )
+
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    return result.stdout.strip()
+
+
+def test_import_does_not_load_heavy_modules():
+
+    loaded = _run(
+        "import lab_demo, sys; "
+        "print(','.join(m for m in ('pandas', 'matplotlib') "
+        "if m in sys.modules))"
+    )
+
+    assert loaded == ''
+
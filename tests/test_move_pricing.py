@@ -0,0 +1,38 @@
+'''
+Moves are priced incrementally from the cost prefixes rather than by costing
+the whole solution again, so the cost the solver tracks can drift away from the
+real one if the pricing is wrong. Rebuilding the best solution from scratch
+must give the same cost as the solver reports.
+'''
+
+from lab_demo import Solver
+
+import pytest
+
+
+@pytest.mark.parametrize('slots_per_hour', [1, 4])
+@pytest.mark.parametrize('move_type', Solver.MOVE_TYPES)
+def test_best_cost_matches_rebuilt_cost(problem, move_type, slots_per_hour):
+
+    solver = Solver(
+        problem=problem,
+        iterations=2000,
+        temperature=10,
+        cooling_rate=0.99,
+        turn_off_pct=15,
+        slots_per_hour=slots_per_hour,
+        seed=0,
+        write_csvs=False,
+        move_probabilities={move_type: 1}
+    )
+    solver.solve()
+
+    # Make sure we actually exercised the move
+    assert solver.get_move_stats()[move_type]['accepted'] > 0
+
+    best_cost = solver.get_best_cost()
+
+    solver._solution = solver._best_ever_solution.copy()
+    rebuilt_cost = solver._rebuild_production_map()
+
+    assert best_cost == pytest.approx(rebuilt_cost)
@@ -0,0 +1,48 @@
+from lab_demo import Solver
+
+import pytest
+
+
+def make_solver(problem, slots_per_hour=1):
+
+    return Solver(
+        problem=problem,
+        iterations=1000,
+        temperature=10,
+        cooling_rate=0.99,
+        turn_off_pct=15,
+        slots_per_hour=slots_per_hour,
+        seed=0,
+        write_csvs=False
+    )
+
+
+@pytest.mark.parametrize(
+    'start_hour, end_hour, window_hours',
+    [(206, 200, 24), (200, 200, 24), (200, 206, -1)]
+)
+def test_repair_rejects_bad_window(
+    problem, start_hour, end_hour, window_hours
+):
+
+    solver = make_solver(problem)
+    solver.solve()
+
+    with pytest.raises(ValueError):
+        solver.repair_outage(3, start_hour, end_hour, window_hours)
+
+
+def test_repair_leaves_problem_alone(problem):
+
+    solver = make_solver(problem)
+    solver.solve()
+    solver.repair_outage(3, 200, 206)
+
+    assert (solver._productivity_map[3][200:206] == 0).all()
+    assert all(machine.calendar is None for machine in problem.machines)
+
+    # A new Solver shouldn't know about the outage, at any resolution
+    other_solver = make_solver(problem, slots_per_hour=4)
+    other_solver.solve()
+
+    assert (other_solver._productivity_map[3][200:206] > 0).any()
@@ -0,0 +1,75 @@
+from lab_demo import ShiftCalendar, Solver
+from lab_demo.config import Config
+
+from math import ceil
+
+import numpy as np
+import pytest
+
+
+# Deliberately not a whole number of weeks
+NUM_HOURS = 400
+
+
+@pytest.mark.parametrize('slots_per_hour', [1, 4])
+@pytest.mark.parametrize('pattern', sorted(Config.SHIFT_PATTERNS))
+def test_from_shift_pattern_matches_config(pattern, slots_per_hour):
+
+    shift_pattern = Config.SHIFT_PATTERNS[pattern]
+
+    week = []
+    for day in sorted(shift_pattern):
+        week.extend(shift_pattern[day])
+    expected = np.tile(week, ceil(NUM_HOURS / len(week)))[:NUM_HOURS]
+
+    calendar = ShiftCalendar.from_shift_pattern(
+        shift_pattern, NUM_HOURS, slots_per_hour
+    )
+
+    assert calendar.num_slots == NUM_HOURS * slots_per_hour
+    np.testing.assert_array_equal(calendar.to_hourly(), expected)
+
+
+def test_part_hour_runs():
+
+    # 6am to 8am at 15 minute resolution, with a break from 6:45 to 7
+    calendar = ShiftCalendar(
+        [(24, 27, 1), (28, 32, 1)], num_slots=40, slots_per_hour=4
+    )
+
+    np.testing.assert_allclose(
+        calendar.to_hourly(), [0, 0, 0, 0, 0, 0, 0.75, 1, 0, 0]
+    )
+
+    # Only part of each hour falls between 6:15 and 7:30
+    first_hour, output = calendar.hourly_output(25, 30)
+    assert first_hour == 6
+    np.testing.assert_allclose(output, [0.5, 0.5])
+
+
+def test_slots_per_hour_gives_same_results(problem):
+    """ On the hourly shift patterns, finer slots shouldn't change anything """
+
+    costs, solutions = [], []
+    for slots_per_hour in (1, 4):
+        solver = Solver(
+            problem=problem,
+            iterations=1000,
+            temperature=10,
+            cooling_rate=0.99,
+            turn_off_pct=15,
+            slots_per_hour=slots_per_hour,
+            seed=0,
+            write_csvs=False
+        )
+        solver.solve()
+        costs.append(solver.get_best_cost())
+
+        # One product per block, so these line up between resolutions
+        solutions.append({
+            machine_id: list(products)
+            for machine_id, products in solver._best_ever_solution.items()
+        })
+
+    assert costs[0] == pytest.approx(costs[1])
+    assert solutions[0] == solutions[1]